@@ -3,19 +3,23 @@ import argparse
 import configparser
 import csv
 import enum
-import json
+import functools
 import math
 import os
 import sys
+import threading
+import time
 from collections import namedtuple
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import List
+from urllib.parse import parse_qs, urlparse
 
-import matplotlib.pyplot as pyplot
+import numpy as np
+import orjson
 import requests
-from bs4 import BeautifulSoup
-from github import Github, UnknownObjectException
+from github import Github, GithubException, UnknownObjectException
 
 
 class UnknownRepository(Exception):
@@ -25,6 +29,10 @@ class UnknownRepository(Exception):
 class StatKind(enum.Enum):
     Issues = 0,
     Stars = 1
+    Commits = 2
+    CodeFrequency = 3
+    Dependents = 4
+    DependentPackages = 5
 
 
 def utcnow() -> datetime:
@@ -35,16 +43,126 @@ def utcnow() -> datetime:
         return datetime.now(UTC)
 
 
-def write_datetime(obj):
-    if isinstance(obj, datetime):
-        return {"iso": obj.isoformat()}
-
-
-def read_datetime(obj):
-    iso_format = obj.get('iso')
-    if iso_format is not None:
-        return datetime.fromisoformat(iso_format)
-    return obj
+# the cached fields that contain dates, per kind of statistics
+cached_date_fields = {
+    StatKind.Issues: ("created_at", "closed_at"),
+    StatKind.Stars: ("starred_at",),
+}
+# the fields of the statistics that are stored column-wise in the cache
+# (schema 2), instead of as a list of items (schema 1)
+cached_columns = {
+    StatKind.Issues: ("number", "is_pr", "state", "created_at", "closed_at"),
+    StatKind.Stars: ("id", "starred_at"),
+}
+cache_schema = 2
+
+
+def read_datetime(value):
+    # older cache files contain the dates as {"iso": date} objects
+    if isinstance(value, dict):
+        value = value.get("iso")
+    if value is not None:
+        # the API returns UTC dates with a Z suffix, which is not
+        # understood by fromisoformat before Python 3.11
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        return datetime.fromisoformat(value)
+    return value
+
+
+def timestamps(times):
+    # the API timestamps have a resolution of seconds
+    return np.fromiter((int(t.timestamp()) for t in times), dtype=np.int64,
+                       count=len(times))
+
+
+def count_over_time(opened, closed):
+    # merges the opening and closing times into one sorted sequence
+    # (closing events before opening events at the same time) and returns
+    # it with the accumulated count of open items at each time
+    opened = np.array(opened, dtype=object)
+    closed = np.array(closed, dtype=object)
+    # the items are mostly already in order, which the stable sort
+    # handles in about linear time
+    open_keys = timestamps(opened)
+    open_order = np.argsort(open_keys, kind="stable")
+    close_keys = timestamps(closed)
+    close_order = np.argsort(close_keys, kind="stable")
+    # each closing event is preceded by all earlier opening events
+    # and all earlier closing events
+    close_pos = (np.searchsorted(open_keys[open_order],
+                                 close_keys[close_order], side="left") +
+                 np.arange(len(closed)))
+    times = np.empty(len(opened) + len(closed), dtype=object)
+    diffs = np.ones(len(times), dtype=np.int8)
+    is_open = np.ones(len(times), dtype=bool)
+    is_open[close_pos] = False
+    times[is_open] = opened[open_order]
+    times[close_pos] = closed[close_order]
+    diffs[close_pos] = -1
+    return times, np.cumsum(diffs)
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets downsampling: splits the points
+    # between the first and the last one into n_out - 2 buckets and
+    # selects from each bucket the point forming the largest triangle
+    # with the last selected point and the average of the next bucket
+    n = len(x)
+    if n_out < 3 or n <= n_out:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected]) -
+                       (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+@functools.lru_cache(maxsize=4)
+def github_client(username, token, per_page):
+    # the client (and its connection) is shared by all GitHubStats
+    # instances using the same credentials
+    return Github(username, token, per_page=per_page)
+
+
+@functools.lru_cache(maxsize=None)
+def styled_pyplot():
+    # matplotlib is imported only if needed, as the import is slow,
+    # and the style is only applied once
+    import matplotlib.pyplot as pyplot
+
+    pyplot.style.use("seaborn-v0_8")
+    return pyplot
+
+
+def page_links(headers):
+    # returns the URLs of the related pages by relation ("next", "last")
+    # from the Link header of a paginated API response
+    links = requests.utils.parse_header_links(headers.get("link", ""))
+    return {link["rel"]: link["url"] for link in links}
+
+
+def print_lines(lines):
+    # prints the lines with a single write instead of one print per line
+    if lines:
+        print("\n".join(lines))
+
+
+# parsed credentials by ini file path, modification time and size,
+# shared by all ConfigReader instances
+_config_cache = {}
 
 
 class ConfigReader:
@@ -53,42 +171,59 @@ class ConfigReader:
     def __init__(self):
         self._username: str = ""
         self._token: str = ""
+        self._parsed = False
 
     @property
     def username(self) -> str:
-        if not self._username:
-            self.parse()
+        self.parse()
         return self._username
 
     @property
     def token(self) -> str:
-        if not self._token:
-            self.parse()
+        self.parse()
         return self._token
 
     def ini_path(self):
-        # first check in the repository root path
-        current_path = Path(__file__).parent.parent
-        path = current_path / self.ini_file
-        if path.exists():
-            return path
+        # first check in the repository root path,
         # fall back to home directory
-        path = Path.home() / self.ini_file
-        if path.exists():
-            return path
+        for base_path in (Path(__file__).parent.parent, Path.home()):
+            path = base_path / self.ini_file
+            if path.exists():
+                return path
         raise FileNotFoundError(
             f"Missing initialization file {self.ini_file}, "
             f"cannot authorize to GitHub")
 
     def parse(self):
-        config = configparser.ConfigParser()
-        config.read(self.ini_path())
-        self._username = config.get("auth", "username")
-        self._token = config.get("auth", "token")
+        if self._parsed:
+            return
+        path = self.ini_path()
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if key not in _config_cache:
+            config = configparser.ConfigParser()
+            config.read(path)
+            # only successfully parsed files are cached
+            _config_cache[key] = (config.get("auth", "username"),
+                                  config.get("auth", "token"))
+        self._username, self._token = _config_cache[key]
+        self._parsed = True
 
 
 class GitHubStats:
     cache_dir = ".ghrepo-stats"
+    api_url = "https://api.github.com"
+    # number of items per page in API requests (maximum allowed value)
+    per_page = 100
+    # number of pages fetched concurrently - rate limits and retries
+    # after secondary rate limits are handled by PyGithub
+    max_workers = 4
+    # number of retries and delay in seconds if statistics are
+    # not available yet
+    stats_retries = 5
+    stats_retry_delay = 2
+    # maximum number of points shown in a plot
+    max_plot_points = 2000
 
     def __init__(self, repo_name: str, verbose: bool, csv_file: str = "",
                  show_packages: bool = False, min_stars: int = 0):
@@ -97,7 +232,8 @@ class GitHubStats:
         self.show_packages = show_packages
         self.min_stars = min_stars
         self.config = ConfigReader()
-        self.github = Github(self.config.username, self.config.token)
+        self._github = None
+        self._repository = None
         if csv_file:
             extension = os.path.splitext(csv_file)[1]
             if not extension:
@@ -110,59 +246,62 @@ class GitHubStats:
     def pr_stats(self):
         return self.issue_pr_stats(show_issues=False)
 
+    @property
+    def github(self):
+        # the configuration is only read if the GitHub API is used
+        if self._github is None:
+            self._github = github_client(self.config.username,
+                                         self.config.token, self.per_page)
+        return self._github
+
     def repository(self):
-        try:
-            return self.github.get_repo(self.repo_name)
-        except UnknownObjectException:
-            raise UnknownRepository(
-                f"No repository found with name {self.repo_name}")
+        if self._repository is None:
+            try:
+                self._repository = self.github.get_repo(self.repo_name)
+            except UnknownObjectException:
+                raise UnknownRepository(
+                    f"No repository found with name {self.repo_name}")
+        return self._repository
 
     def issue_pr_stats(self, show_issues: bool):
         issues = self.collect_issues_or_prs(show_issues)
-        times = []
-        for issue in issues:
-            times.append((issue.opened, 1))
-            if issue.closed is not None:
-                times.append((issue.closed, -1))
-
-        times = sorted(times)
-        issue_nrs = []
-        issue_times = []
-        nr = 0
-        for t, diff in times:
-            nr += diff
-            issue_nrs.append(nr)
-            issue_times.append(t)
+        opened = [issue.opened for issue in issues]
+        closed = [issue.closed for issue in issues if issue.closed is not None]
+        issue_times, issue_nrs = count_over_time(opened, closed)
 
         issue_type = "issues" if show_issues else "pull requests"
         title = f"Number of open {issue_type} over time"
-        return self.handle_output(issue_nrs, issue_times, title)
+        return self.handle_output(issue_nrs, issue_times, title, steps=True)
 
     def star_stats(self):
         start = utcnow()
         stargazers = self.repository().get_stargazers_with_dates().reversed
         cached, since = self.cached_result(StatKind.Stars)
-        existing_ids = [e["id"] for e in cached]
+        existing_ids = {e["id"] for e in cached}
         results = []
+        output = []
         cache_is_valid = False
         for stargazer in stargazers:
             if self.verbose:
-                print(stargazer.starred_at, stargazer.user.login)
+                output.append(f"{stargazer.starred_at} {stargazer.user.login}")
             user_id = stargazer.user.id
             if user_id in existing_ids:
                 # we found at least one id that is in the cache
                 cache_is_valid = True
                 found_all = False
-                if len(cached) > stargazers.totalCount - len(results):
+                # the total count is only requested if it is needed
+                # (not on the first call with an empty cache)
+                total = stargazers.totalCount
+                remaining = total - len(results)
+                if len(cached) > remaining:
                     # at least one star has been removed - we remove the cache
                     # entries backwards until we find the first removed star
-                    while cached and len(cached) > stargazers.totalCount - len(results):
-                        last_id = existing_ids.pop()
-                        cached.pop()
+                    while cached and len(cached) > remaining:
+                        last_id = cached.pop()["id"]
+                        existing_ids.discard(last_id)
                         if last_id == user_id:
                             break
-                        if (len(cached) == stargazers.totalCount - len(results) and
-                                existing_ids[-1] == user_id):
+                        if len(cached) == remaining and cached[-1]["id"] == user_id:
                             found_all = True
                             break
                     if found_all:
@@ -173,57 +312,106 @@ class GitHubStats:
                 "starred_at": stargazer.starred_at,
                 "id": stargazer.user.id
             })
-        if not cache_is_valid or len(cached) > stargazers.totalCount - len(results):
+        print_lines(output)
+        if not cache_is_valid or len(cached) > total - len(results):
             cached.clear()
         if results:
             results.sort(key=lambda s: s["starred_at"])
             cached.extend(results)
             self.write_cache(cached, start, StatKind.Stars)
 
-        times = []
-        for stargazer in cached:
-            times.append(stargazer["starred_at"])
+        star_times = [stargazer["starred_at"] for stargazer in cached]
         if self.verbose:
             print(f"Getting stars took {utcnow() - start}")
-        star_nrs = []
-        star_times = []
-        nr = 0
-        for t in times:
-            nr += 1
-            star_nrs.append(nr)
-            star_times.append(t)
+        star_nrs = np.arange(1, len(star_times) + 1)
 
         title = f"Number of stargazers over time"
-        return self.handle_output(star_nrs, star_times, title)
+        return self.handle_output(star_nrs, star_times, title, steps=True)
 
     def commit_stats(self):
-        commits = self.repository().get_stats_commit_activity()
+        commits = self.stats_result(StatKind.Commits, "commit_activity")
         times = []
         commit_nrs = []
+        output = []
         for commit_stat in commits:
+            week = datetime.fromtimestamp(commit_stat["week"], timezone.utc)
             if self.verbose:
-                print(commit_stat.week, commit_stat.total)
-            times.append(commit_stat.week)
-            commit_nrs.append(commit_stat.total)
+                output.append(f"{week} {commit_stat['total']}")
+            times.append(week)
+            commit_nrs.append(commit_stat["total"])
+        print_lines(output)
 
         title = f"Number of commit per week in last year"
         return self.handle_output(commit_nrs, times, title)
 
     def code_size_change(self):
-        freq_stats = self.repository().get_stats_code_frequency()
+        freq_stats = self.stats_result(StatKind.CodeFrequency, "code_frequency")
         times = []
-        commit_size = []
-        code_size = 0
-        for freq in freq_stats:
+        size_changes = []
+        output = []
+        for week, additions, deletions in freq_stats:
+            week = datetime.fromtimestamp(week, timezone.utc)
             if self.verbose:
-                print(freq.week, freq.additions, freq.deletions)
-            times.append(freq.week)
-            code_size += freq.additions - freq.deletions
-            commit_size.append(code_size)
+                output.append(f"{week} {additions} {deletions}")
+            times.append(week)
+            # deletions are given as negative numbers
+            size_changes.append(additions + deletions)
+        print_lines(output)
+        commit_size = np.cumsum(size_changes, dtype=np.int64)
 
         title = f"Change of code size over time"
         return self.handle_output(commit_size, times, title)
 
+    def stats_result(self, stat_kind, endpoint):
+        # the statistics are cached together with their ETag, so that
+        # unchanged statistics are not transferred again (the conditional
+        # request returns 304 in this case and does not count against
+        # the rate limit)
+        cached = self.read_cache(stat_kind) or {}
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"token {self.config.token}"
+        }
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        start = utcnow()
+        url = f"{self.api_url}/repos/{self.repo_name}/stats/{endpoint}"
+        # the request is not made via PyGithub, as its requester retries
+        # requests answered with 202 without limit
+        response = requests.get(url, headers=headers, timeout=30)
+        retries = self.stats_retries
+        while response.status_code == 202 and retries > 0:
+            # the statistics are computed by GitHub after the first request -
+            # they are usually available after a few seconds
+            time.sleep(self.stats_retry_delay)
+            response = requests.get(url, headers=headers, timeout=30)
+            retries -= 1
+        status = response.status_code
+        if status == 404:
+            raise UnknownRepository(
+                f"No repository found with name {self.repo_name}")
+        if status >= 400:
+            raise GithubException(status, response.text,
+                                  dict(response.headers))
+        if self.verbose:
+            print(f"Getting {endpoint} statistics took {utcnow() - start}")
+        if status == 304:
+            return cached["data"]
+        if status == 204:
+            # the repository is empty
+            return []
+        if status == 202:
+            # the statistics are still computed by GitHub
+            if "data" in cached:
+                print("Statistics are not available yet - "
+                      "showing cached statistics.")
+                return cached["data"]
+            print("Statistics are not available yet - please try again later.")
+            return []
+        result = orjson.loads(response.content)
+        self.write_cache(result, start, stat_kind, response.headers.get("ETag"))
+        return result
+
     def issue_pr_lifetime(self, show_issues: bool):
         # count the lifetime weekly
         issues = self.collect_issues_or_prs(show_issues)
@@ -231,38 +419,51 @@ class GitHubStats:
         if not issues:
             return self.handle_output([], [], "")
 
-        slots: List[dict] = []
-        start_time = issues[0].opened
-        now = utcnow()
-        slot_time = start_time
-        while slot_time < now:
-            slots.append({"time": slot_time, "nr": 0, "days": 0})
-            slot_time = slot_time + timedelta(days=7)
-
-        slot_len = len(slots)
-        for issue in issues:
-            days_from_start = (issue.opened - start_time).days
-            index = days_from_start // 7
-            days = 7 - days_from_start % 7
-            end_time = issue.closed or now
-            # add increasing issue length at issue lifetime
-            while index < slot_len and slots[index]["time"] < end_time:
-                slots[index]["days"] += days
-                slots[index]["nr"] += 1
-                days += 7
-                index += 1
-            days = (end_time - issue.opened).days
-            # add issue duration to slots after it is closed
-            while index < slot_len:
-                slots[index]["days"] += days
-                slots[index]["nr"] += 1
-                index += 1
-
-        issue_nrs = []
-        issue_times = []
-        for slot in slots:
-            issue_nrs.append(slot["days"] // slot["nr"])
-            issue_times.append(slot["time"])
+        # the calculation is done with timestamps in seconds
+        opened = timestamps([issue.opened for issue in issues])
+        # an aware datetime is needed, as the timestamp of a naive one is
+        # taken as local time
+        now = datetime.now(timezone.utc)
+        closed = timestamps([issue.closed or now for issue in issues])
+        first = int(np.argmin(opened))
+        start_time = issues[first].opened
+        start = opened[first]
+        day = 24 * 60 * 60
+        week = 7 * day
+        # number of weekly slots starting before now
+        slot_len = max(0, -((start - int(now.timestamp())) // week))
+
+        days_from_start = (opened - start) // day
+        # number of slots starting before the issue has been closed
+        end_index = -((start - closed) // week)
+        duration = (closed - opened) // day
+
+        # in the slots from open_index to close_index, the issue is open
+        # and its lifetime increases by 7 days per slot, starting with
+        # first_days; in the following slots its lifetime is the duration
+        open_index = days_from_start // 7
+        close_index = np.minimum(np.maximum(end_index, open_index), slot_len)
+        first_days = 7 - days_from_start % 7
+
+        # the values are accumulated as differences to the previous slot
+        size = max(slot_len, int(open_index.max())) + 1
+        slot_nr = np.zeros(size, dtype=np.int64)
+        np.add.at(slot_nr, open_index, 1)
+        open_nr = slot_nr.copy()
+        np.add.at(open_nr, close_index, -1)
+        open_days = np.zeros(size, dtype=np.int64)
+        np.add.at(open_days, open_index, first_days - 7 * open_index)
+        np.add.at(open_days, close_index, 7 * open_index - first_days)
+        closed_days = np.zeros(size, dtype=np.int64)
+        np.add.at(closed_days, close_index, duration)
+
+        slot_nr = np.cumsum(slot_nr)[:slot_len]
+        slot_days = (np.cumsum(open_days)[:slot_len] +
+                     7 * np.arange(slot_len) * np.cumsum(open_nr)[:slot_len] +
+                     np.cumsum(closed_days)[:slot_len])
+        issue_nrs = slot_days // np.maximum(slot_nr, 1)
+        issue_times = [start_time + timedelta(weeks=index)
+                       for index in range(slot_len)]
 
         issue_type = "issues" if show_issues else "pull requests"
         title = f"Lifetime of {issue_type} over time"
@@ -270,73 +471,164 @@ class GitHubStats:
 
     def collect_issues_or_prs(self, collect_issues):
         cached, since = self.cached_result(StatKind.Issues)
-        last_number = 0
-        kwargs = {"state": "all"}
+        params = {"state": "all", "per_page": self.per_page}
         if cached:
-            kwargs["since"] = since + timedelta(seconds=1)
-            last_number = cached[-1]["number"]
+            params["since"] = (since + timedelta(seconds=1)).strftime(
+                "%Y-%m-%dT%H:%M:%SZ")
         start = utcnow()
-        results = self.repository().get_issues(**kwargs)
-        new_results = []
+        results = self.fetch_pages(f"/repos/{self.repo_name}/issues", params)
+        cached_issues = {c["number"]: c for c in cached}
+        new_issues = {}
         for result in results:
-            new_results.append({
-                "is_pr": result.pull_request is not None,
-                "created_at": result.created_at,
-                "closed_at": result.closed_at,
-                "number": result.number,
-                "state": result.state
-            })
-            if result.number <= last_number:
+            issue = {
+                # the pull_request field only exists for pull requests
+                "is_pr": "pull_request" in result,
+                "created_at": read_datetime(result["created_at"]),
+                "closed_at": read_datetime(result["closed_at"]),
+                "number": result["number"],
+                "state": result["state"]
+            }
+            number = issue["number"]
+            if number in cached_issues:
                 # an existing issues has been closed or reopened -
-                # remove it from cache
-                for c in cached:
-                    if c["number"] == result.number:
-                        cached.remove(c)
-                        break
+                # replace it in the cache
+                cached_issues[number] = issue
+            else:
+                # issues shifted to the next page while fetching the pages
+                # are returned twice
+                new_issues[number] = issue
         if self.verbose:
             print(f"Getting issues/prs took {utcnow() - start}")
-        if new_results:
+        # the cache is also written if the returned issues did not change
+        # in the cached fields (e.g. after new comments), so that they are
+        # not requested again in the next run
+        if results:
+            cached = list(cached_issues.values())
+            # new issues usually have higher numbers than all cached issues,
+            # so the (sorted) cache has only to be sorted if this is not the case
+            new_results = sorted(new_issues.values(), key=lambda v: v["number"])
+            needs_sort = (cached and new_results and
+                          new_results[0]["number"] < cached[-1]["number"])
             cached.extend(new_results)
-            cached.sort(key=lambda v: v["number"])
+            if needs_sort:
+                cached.sort(key=lambda v: v["number"])
             self.write_cache(cached, start, StatKind.Issues)
 
+        is_pr = np.fromiter((c["is_pr"] for c in cached),
+                            dtype=bool, count=len(cached))
+        created = timestamps([c["created_at"] for c in cached])
+        closed_at = [c["closed_at"] for c in cached]
+        is_closed = np.fromiter((c is not None for c in closed_at),
+                                dtype=bool, count=len(cached))
+        open_time = np.zeros(len(cached), dtype=np.int64)
+        open_time[is_closed] = (
+            timestamps([c for c in closed_at if c is not None]) -
+            created[is_closed])
+        # ignore immediately closed issues
+        # happens for imported closed issues
+        immediately_closed = is_closed & (open_time >= 0) & (open_time < 60)
+        # ignore PRs or issues
+        selected = np.flatnonzero((is_pr != collect_issues) & ~immediately_closed)
+
         Issue = namedtuple("Issue", ["opened", "closed"])
         issues: List[Issue] = []
-        for issue in cached:
-            if collect_issues == issue["is_pr"]:
-                # ignore PRs or issues
-                continue
-            if issue["closed_at"] is not None:
-                open_time = issue["closed_at"] - issue["created_at"]
-                if open_time.days == 0 and open_time.seconds < 60:
-                    # ignore immediately closed issues
-                    # happens for imported closed issues
-                    continue
+        output = []
+        for index in selected:
+            issue = cached[index]
             if self.verbose:
-                print(issue["number"], issue["created_at"], issue["closed_at"])
+                output.append(f"{issue['number']} {issue['created_at']} "
+                              f"{issue['closed_at']}")
             issues.append(Issue(opened=issue["created_at"],
                                 closed=issue["closed_at"]))
+        print_lines(output)
         return issues
 
+    def fetch_pages(self, url, params):
+        # fetches all pages of a paginated API result - the first page
+        # contains the link to the last page, so the other pages can be
+        # fetched concurrently without requesting the total count first
+        try:
+            headers, results = self.github.requester.requestJsonAndCheck(
+                "GET", url, parameters=params)
+        except UnknownObjectException:
+            raise UnknownRepository(
+                f"No repository found with name {self.repo_name}")
+        links = page_links(headers)
+        if "last" not in links:
+            return results
+        last_page = int(parse_qs(urlparse(links["last"]).query)["page"][0])
+        # the requester of a Github client uses a single connection and is
+        # not thread-safe, so each worker thread uses its own client
+        local = threading.local()
+
+        def get_page(page):
+            if not hasattr(local, "requester"):
+                local.requester = Github(
+                    self.config.username, self.config.token,
+                    per_page=self.per_page).requester
+            return local.requester.requestJsonAndCheck(
+                "GET", url, parameters={**params, "page": page})
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for headers, page in executor.map(get_page,
+                                              range(2, last_page + 1)):
+                results.extend(page)
+        # items added in the meantime shift the remaining items to
+        # following pages, which are found via the next page links
+        links = page_links(headers)
+        while "next" in links:
+            headers, page = self.github.requester.requestJsonAndCheck(
+                "GET", links["next"])
+            results.extend(page)
+            links = page_links(headers)
+        return results
+
     def issue_lifetime(self):
         return self.issue_pr_lifetime(show_issues=True)
 
     def pr_lifetime(self):
         return self.issue_pr_lifetime(show_issues=False)
 
-    def handle_output(self, numbers, times, title):
-        if not numbers:
+    def handle_output(self, numbers, times, title, steps=False):
+        if len(numbers) == 0:
             print("No data points available - nothing to do.")
             return False
         if self.csv_file:
             return self.write_csv(numbers, times)
-        self.show_plot(numbers, times, title)
+        self.show_plot(numbers, times, title, steps)
         return True
 
-    def show_plot(self, issue_nrs, issue_times, title):
-        pyplot.style.use("seaborn-v0_8")
-        pyplot.plot(issue_times, issue_nrs)
-        max_y = max(issue_nrs) + 1
+    def show_plot(self, issue_nrs, issue_times, title, steps=False):
+        import matplotlib.dates as mdates
+        pyplot = styled_pyplot()
+
+        issue_nrs = np.asarray(issue_nrs)
+        issue_times = np.asarray(issue_times, dtype=object)
+        if steps:
+            # the numbers only change at the given times - draw them as
+            # steps, using only the last number for events at the same time
+            last_at_time = np.append(issue_times[1:] != issue_times[:-1], True)
+            issue_nrs = issue_nrs[last_at_time]
+            issue_times = issue_times[last_at_time]
+        if len(issue_nrs) > self.max_plot_points:
+            # more points are not distinguishable in the plot, but make
+            # the rendering slow
+            indices = lttb_indices(timestamps(issue_times), issue_nrs,
+                                   self.max_plot_points)
+            issue_nrs = issue_nrs[indices]
+            issue_times = issue_times[indices]
+        # the dates are converted at once instead of letting matplotlib
+        # convert each value separately
+        dates = mdates.date2num(issue_times)
+        if steps:
+            pyplot.step(dates, issue_nrs, where="post")
+        else:
+            pyplot.plot(dates, issue_nrs)
+        axis = pyplot.gca().xaxis
+        axis.axis_date()
+        axis.set_major_formatter(
+            mdates.AutoDateFormatter(axis.get_major_locator()))
+        max_y = int(np.max(issue_nrs)) + 1
         step = max(1, max_y // 6)
         order = int(math.log10(step))
         tens = 10 ** order
@@ -356,10 +648,10 @@ class GitHubStats:
                 print(f"Failed to create path {directory} - exiting")
                 return False
         try:
-            with open(self.csv_file, "w") as csv_file:
+            # use a large buffer to write big files in few chunks
+            with open(self.csv_file, "w", buffering=1 << 20) as csv_file:
                 writer = csv.writer(csv_file, lineterminator="\n")
-                for t, nr in zip(times, numbers):
-                    writer.writerow([t, nr])
+                writer.writerows(zip(times, numbers))
         except OSError as ex:
             print(f"Failed to write csv file {self.csv_file}: {ex}")
             return False
@@ -370,62 +662,120 @@ class GitHubStats:
         return (Path.home() / self.cache_dir / org / name /
                 (stat_kind.name + ".json"))
 
-    def cached_result(self, stat_kind):
+    def read_cache(self, stat_kind):
         cache_path = self.cache_path(stat_kind)
         if cache_path.exists():
-            with open(cache_path) as f:
-                cached = json.load(f, object_hook=read_datetime)
-                if cached["data"]:
-                    # check if the cache has timezone info, which has been added at some time
-                    # in the API result, and ignore the cache if not so it will be recreated
-                    first_item = cached["data"][0]
-                    created = "created_at" if stat_kind == StatKind.Issues else "starred_at"
-                    first_date = first_item[created]
-                    if first_date.tzinfo is None:
-                        return [], None
-                return cached["data"], cached["since"]
+            # orjson writes dates as ISO strings, which are converted back
+            # only for the known date fields
+            cached = orjson.loads(cache_path.read_bytes())
+            cached["since"] = read_datetime(cached["since"])
+            fields = cached_date_fields.get(stat_kind, ())
+            if cached.get("schema", 1) == 1:
+                for item in cached["data"]:
+                    for field in fields:
+                        item[field] = read_datetime(item[field])
+            elif stat_kind in cached_columns:
+                columns = cached["data"]
+                for field in fields:
+                    columns[field] = [read_datetime(value)
+                                      for value in columns[field]]
+                names = list(columns)
+                cached["data"] = [dict(zip(names, values))
+                                  for values in zip(*columns.values())]
+            return cached
+        return None
+
+    def cached_result(self, stat_kind):
+        cached = self.read_cache(stat_kind)
+        if cached is not None:
+            if cached["data"]:
+                # check if the cache has timezone info, which has been added at some time
+                # in the API result, and ignore the cache if not so it will be recreated
+                first_item = cached["data"][0]
+                created = "created_at" if stat_kind == StatKind.Issues else "starred_at"
+                first_date = first_item[created]
+                if first_date.tzinfo is None:
+                    return [], None
+            return cached["data"], cached["since"]
         return [], None
 
-    def write_cache(self, result, date, stat_kind):
+    def write_cache(self, result, date, stat_kind, etag=None):
         cache_path = self.cache_path(stat_kind)
         cache_path.parent.mkdir(parents=True, exist_ok=True)
+        columns = cached_columns.get(stat_kind)
+        if columns is not None:
+            result = {column: [item[column] for item in result]
+                      for column in columns}
         cached = {
+            "schema": cache_schema,
             "since": date,
             "data": result
         }
-        with open(cache_path, "w") as f:
-            json.dump(cached, f, default=write_datetime)
+        if etag:
+            cached["etag"] = etag
+        # write to a temporary file first, so that an interrupted write
+        # does not leave a corrupted cache
+        tmp_path = cache_path.with_suffix(".json.tmp")
+        tmp_path.write_bytes(orjson.dumps(cached))
+        os.replace(tmp_path, cache_path)
 
     def dependents(self):
         # partly taken from https://stackoverflow.com/a/58772379/12480730
+        # BeautifulSoup is only needed here, so it is imported on first use
+        from bs4 import BeautifulSoup, SoupStrainer
+
+        # only parse the dependent rows and the pagination buttons - a
+        # strainer cannot match either of two attributes, so the buttons
+        # are parsed separately
+        row_strainer = SoupStrainer(
+            "div", attrs={"data-test-id": "dg-repo-pkg-dependent"})
+        button_strainer = SoupStrainer(
+            "div", attrs={"class": "paginate-container"})
+        no_commas = str.maketrans("", "", ",")
+
         subquery = "?dependent_type=PACKAGE" if self.show_packages else ""
         url = f"https://github.com/{self.repo_name}/network/dependents{subquery}"
+        # dependent repositories and packages are cached separately
+        stat_kind = (StatKind.DependentPackages if self.show_packages
+                     else StatKind.Dependents)
+        start = utcnow()
+        cached = self.read_cache(stat_kind)
+        cached_pages = cached["data"] if cached else {}
+        # only the pages visited in this run are cached again, so that
+        # pages for outdated URLs do not accumulate in the cache
+        pages = {}
         repos = []
-        while True:
-            r = requests.get(url)
-            soup = BeautifulSoup(r.content, "html.parser")
-            data = [
-                ("{}/{}".format(
-                    t.find('a',
-                           {"data-repository-hovercards-enabled": ""}).text,
-                    t.find('a', {"data-hovercard-type": "repository"}).text
-                ), int(t.div.span.text.strip().replace(",", "")))
-                for t in
-                soup.findAll("div", {"data-test-id": "dg-repo-pkg-dependent"})
-            ]
-            if not data:
-                break
-            repos.extend([r for r in data if r[1] >= self.min_stars])
-
-            button_anchors = soup.find(
-                "div", {"class": "paginate-container"}
-            ).find_all("a")
-            for anchor in button_anchors:
-                if anchor.text == "Next":
-                    url = anchor["href"]
+        # use one session for all pages to reuse the connection
+        with requests.Session() as session:
+            while True:
+                content = self.dependents_page(session, url, cached_pages,
+                                               pages)
+                soup = BeautifulSoup(content, "lxml", parse_only=row_strainer)
+                rows = soup.find_all(
+                    "div", {"data-test-id": "dg-repo-pkg-dependent"})
+                if not rows:
                     break
-            else:
-                break
+                for row in rows:
+                    # check the stars first to skip the names of ignored rows
+                    stars = int(row.div.span.text.strip().translate(no_commas))
+                    if stars < self.min_stars:
+                        continue
+                    owner = row.find(
+                        "a", {"data-repository-hovercards-enabled": ""}).text
+                    name = row.find(
+                        "a", {"data-hovercard-type": "repository"}).text
+                    repos.append((f"{owner}/{name}", stars))
+
+                buttons = BeautifulSoup(content, "lxml",
+                                        parse_only=button_strainer)
+                button_anchors = buttons.find_all("a")
+                for anchor in button_anchors:
+                    if anchor.text == "Next":
+                        url = anchor["href"]
+                        break
+                else:
+                    break
+        self.write_cache(pages, start, stat_kind)
         # sort descending by number of stargazers
         repos.sort(key=lambda d: d[1], reverse=True)
         if self.csv_file:
@@ -434,22 +784,45 @@ class GitHubStats:
             self.write_csv(stars, names)
         else:
             # if no file was given, just write to stdout
-            for name, star in repos:
-                print(f"{name}\t{star}")
-
-
-def main():
-    commands = {
-        "issues": GitHubStats.issue_stats,
-        "prs": GitHubStats.pr_stats,
-        "stars": GitHubStats.star_stats,
-        "commits": GitHubStats.commit_stats,
-        "codesize": GitHubStats.code_size_change,
-        "issue-life": GitHubStats.issue_lifetime,
-        "pr-life": GitHubStats.pr_lifetime,
-        "dependents": GitHubStats.dependents
-    }
-    command_string = ", ".join([f"'{cmd}'" for cmd in commands])
+            print_lines([f"{name}\t{star}" for name, star in repos])
+
+    def dependents_page(self, session, url, cached_pages, pages):
+        # the pages are cached with their ETag, so that unchanged pages
+        # are not transferred again
+        cached_page = cached_pages.get(url)
+        headers = {}
+        if cached_page:
+            headers["If-None-Match"] = cached_page["etag"]
+        r = session.get(url, headers=headers, timeout=30)
+        if r.status_code == 304:
+            pages[url] = cached_page
+            return cached_page["html"]
+        if r.status_code != 200:
+            # an error page (e.g. after too many requests) would look like
+            # the end of the list - the cache is not written in this case
+            raise requests.HTTPError(
+                f"Failed to get {url}: status {r.status_code}", response=r)
+        etag = r.headers.get("ETag")
+        if etag:
+            pages[url] = {"etag": etag, "html": r.text}
+        return r.text
+
+
+commands = {
+    "issues": GitHubStats.issue_stats,
+    "prs": GitHubStats.pr_stats,
+    "stars": GitHubStats.star_stats,
+    "commits": GitHubStats.commit_stats,
+    "codesize": GitHubStats.code_size_change,
+    "issue-life": GitHubStats.issue_lifetime,
+    "pr-life": GitHubStats.pr_lifetime,
+    "dependents": GitHubStats.dependents
+}
+command_string = ", ".join([f"'{cmd}'" for cmd in commands])
+
+
+@functools.lru_cache(maxsize=None)
+def create_parser():
     parser = argparse.ArgumentParser(
         description="Shows GitHub repo statistics")
     parser.add_argument("sub_command",
@@ -469,7 +842,11 @@ def main():
                         help="Only for dependents: limits the output to "
                              "dependents with at least the given number of "
                              "stargazers.")
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
     repo_name = args.repo_name
     sub_command = args.sub_command.lower()
 
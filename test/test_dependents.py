@@ -0,0 +1,189 @@
+import json
+from pathlib import Path
+from unittest import mock
+
+import pytest
+import requests
+
+from ghrepo_stats.show_gh_stats import GitHubStats
+
+BASE_URL = "https://github.com/owner/repo/network/dependents"
+
+
+def dependent(owner, name, stars):
+    return f"""
+<div class="Box-row" data-test-id="dg-repo-pkg-dependent">
+  <img class="avatar" src="">
+  <span class="f5">
+    <a data-hovercard-type="user" data-repository-hovercards-enabled=""
+       href="/{owner}">{owner}</a> /
+    <a data-hovercard-type="repository" href="/{owner}/{name}">{name}</a>
+  </span>
+  <div class="d-flex">
+    <span class="color-fg-muted"><svg></svg>
+      {stars}
+    </span>
+    <span class="color-fg-muted"><svg></svg>
+      3
+    </span>
+  </div>
+</div>"""
+
+
+def dependents_page(dependents, next_url=None):
+    next_link = (f'<a href="{next_url}">Next</a>' if next_url
+                 else '<button disabled="disabled">Next</button>')
+    return f"""
+<html><body>
+<div id="dependents">
+{"".join(dependent(*d) for d in dependents)}
+</div>
+<div class="paginate-container">
+  <div class="BtnGroup">
+    <button disabled="disabled">Previous</button>
+    {next_link}
+  </div>
+</div>
+</body></html>"""
+
+
+def response(status_code, text="", etag=None):
+    r = mock.Mock()
+    r.status_code = status_code
+    r.text = text
+    r.content = text.encode()
+    r.headers = {"ETag": etag} if etag else {}
+    return r
+
+
+@pytest.fixture
+def get_page():
+    with mock.patch("ghrepo_stats.show_gh_stats.requests.Session") as patched:
+        session = patched.return_value
+        session.__enter__.return_value = session
+        yield session.get
+
+
+@pytest.fixture
+def pages():
+    yield {
+        BASE_URL: dependents_page([("user1", "repo1", "1,234"),
+                                   ("user2", "repo2", "12")],
+                                  next_url=BASE_URL + "?page=2"),
+        BASE_URL + "?page=2": dependents_page([("user3", "repo3", "100")],
+                                              next_url=BASE_URL + "?page=3"),
+        BASE_URL + "?page=3": dependents_page([]),
+    }
+
+
+def test_dependents(ini_file, github, get_page, pages, capsys):
+    get_page.side_effect = lambda url, **kwargs: response(
+        200, pages[url], etag=f'W/"{url}"')
+    GitHubStats("owner/repo", False).dependents()
+    assert capsys.readouterr().out.split("\n") == [
+        "user1/repo1\t1234",
+        "user3/repo3\t100",
+        "user2/repo2\t12",
+        ""
+    ]
+
+
+def test_rows_found_by_test_id(ini_file, github, get_page, pages, capsys):
+    # the row layout classes may change, the test id is used to find them
+    get_page.side_effect = lambda url, **kwargs: response(
+        200, pages[url].replace('class="Box-row"', 'class="Box-item"'))
+    GitHubStats("owner/repo", False).dependents()
+    assert len(capsys.readouterr().out.strip().split("\n")) == 3
+
+
+def test_min_stars(ini_file, github, get_page, pages, capsys):
+    get_page.side_effect = lambda url, **kwargs: response(200, pages[url])
+    GitHubStats("owner/repo", False, min_stars=100).dependents()
+    assert capsys.readouterr().out.split("\n") == [
+        "user1/repo1\t1234",
+        "user3/repo3\t100",
+        ""
+    ]
+
+
+def test_write_csv(ini_file, github, get_page, pages):
+    get_page.side_effect = lambda url, **kwargs: response(200, pages[url])
+    GitHubStats("owner/repo", False, "test.csv").dependents()
+    assert Path("test.csv").read_text() == (
+        "user1/repo1,1234\nuser3/repo3,100\nuser2/repo2,12\n")
+
+
+def test_unchanged_pages_are_read_from_cache(ini_file, github, get_page,
+                                             pages, capsys):
+    get_page.side_effect = lambda url, **kwargs: response(
+        200, pages[url], etag=f'W/"{url}"')
+    GitHubStats("owner/repo", False).dependents()
+    capsys.readouterr()
+
+    get_page.side_effect = lambda url, **kwargs: response(304)
+    GitHubStats("owner/repo", False).dependents()
+    assert get_page.call_count == 6
+    for call in get_page.call_args_list[3:]:
+        url = call[0][0]
+        assert call[1]["headers"] == {"If-None-Match": f'W/"{url}"'}
+    assert capsys.readouterr().out.split("\n") == [
+        "user1/repo1\t1234",
+        "user3/repo3\t100",
+        "user2/repo2\t12",
+        ""
+    ]
+
+
+def test_no_credentials_needed(tmp_home, get_page, pages, capsys):
+    get_page.side_effect = lambda url, **kwargs: response(200, pages[url])
+    GitHubStats("owner/repo", False).dependents()
+    assert "user1/repo1\t1234" in capsys.readouterr().out
+
+
+def test_only_visited_pages_are_cached(ini_file, github, get_page, pages):
+    get_page.side_effect = lambda url, **kwargs: response(
+        200, pages[url], etag=f'W/"{url}"')
+    GitHubStats("owner/repo", False).dependents()
+
+    # the second page now links to another next page
+    pages[BASE_URL + "?page=2"] = dependents_page(
+        [("user3", "repo3", "100")], next_url=BASE_URL + "?page=4")
+    pages[BASE_URL + "?page=4"] = dependents_page([])
+    GitHubStats("owner/repo", False).dependents()
+    cache_path = (Path.home() / ".ghrepo-stats" / "owner" / "repo" /
+                  "Dependents.json")
+    cached = json.loads(cache_path.read_text())
+    assert sorted(cached["data"]) == [
+        BASE_URL, BASE_URL + "?page=2", BASE_URL + "?page=4"]
+
+
+def test_packages_are_cached_separately(ini_file, github, get_page, pages):
+    package_url = BASE_URL + "?dependent_type=PACKAGE"
+    pages[package_url] = dependents_page([("user4", "package4", "10")])
+    get_page.side_effect = lambda url, **kwargs: response(
+        200, pages[url], etag=f'W/"{url}"')
+    GitHubStats("owner/repo", False).dependents()
+    GitHubStats("owner/repo", False, show_packages=True).dependents()
+    cache_dir = Path.home() / ".ghrepo-stats" / "owner" / "repo"
+    cached = json.loads((cache_dir / "Dependents.json").read_text())
+    assert BASE_URL in cached["data"]
+    cached = json.loads((cache_dir / "DependentPackages.json").read_text())
+    assert list(cached["data"]) == [package_url]
+
+
+def test_failed_page_request(ini_file, github, get_page, pages, capsys):
+    get_page.side_effect = lambda url, **kwargs: response(
+        200, pages[url], etag=f'W/"{url}"')
+    GitHubStats("owner/repo", False).dependents()
+    capsys.readouterr()
+    cache_path = (Path.home() / ".ghrepo-stats" / "owner" / "repo" /
+                  "Dependents.json")
+    contents = cache_path.read_text()
+
+    get_page.side_effect = lambda url, **kwargs: (
+        response(429, "Too many requests") if url.endswith("page=2")
+        else response(304))
+    with pytest.raises(requests.HTTPError, match="status 429"):
+        GitHubStats("owner/repo", False).dependents()
+    assert capsys.readouterr().out == ""
+    assert cache_path.read_text() == contents
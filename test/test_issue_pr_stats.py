@@ -1,25 +1,70 @@
 import json
-from datetime import datetime
+import math
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qsl, urlencode, urlparse
 
 import pytest
 
-from ghrepo_stats.show_gh_stats import GitHubStats
+from ghrepo_stats.show_gh_stats import GitHubStats, utcnow
 from test.utils import PaginatedList
 
+# the test double uses small pages to test pagination
+PER_PAGE = 2
+
 
 class Issue:
+    """Mimics the issue data returned by the GitHub API."""
     def __init__(self, number, created_at, closed_at, is_pr, state):
         self.number = number
         self.created_at = created_at
         self.closed_at = closed_at
-        self.pull_request = 1 if is_pr else None
+        self.is_pr = is_pr
         self.state = state
 
+    @property
+    def raw_data(self):
+        data = {
+            "number": self.number,
+            "created_at": self.created_at.isoformat(),
+            "closed_at": self.closed_at and self.closed_at.isoformat(),
+            "state": self.state,
+        }
+        if self.is_pr:
+            data["pull_request"] = {}
+        return data
+
+
+def issue_page(get_issues, verb, url, parameters=None):
+    """Mimics an API request for a page of the issues returned by
+    get_issues, which is called with the query parameters."""
+    url = urlparse(url)
+    query = dict(parse_qsl(url.query))
+    query.update(parameters or {})
+    page = int(query.pop("page", 1))
+    per_page = int(query.pop("per_page"))
+    items = list(get_issues(**query))
+    last_page = max(1, math.ceil(len(items) / per_page))
+    links = []
+    for rel, link_page in (("next", page + 1), ("last", last_page)):
+        if page < last_page:
+            link_query = urlencode(
+                {**query, "per_page": per_page, "page": link_page})
+            links.append(f'<https://api.github.com{url.path}?{link_query}>; '
+                         f'rel="{rel}"')
+    headers = {"link": ", ".join(links)} if links else {}
+    return headers, [item.raw_data
+                     for item in items[(page - 1) * per_page:page * per_page]]
+
 
 @pytest.fixture
-def issues(github):
-    yield github.return_value.get_repo.return_value.get_issues
+def issues(github, monkeypatch):
+    monkeypatch.setattr(GitHubStats, "per_page", PER_PAGE)
+    get_issues = mock.Mock()
+    github.return_value.requester.requestJsonAndCheck.side_effect = (
+        lambda *args, **kwargs: issue_page(get_issues, *args, **kwargs))
+    yield get_issues
 
 
 @pytest.fixture
@@ -45,6 +90,17 @@ def test_no_issues_or_prs(ini_file, issues, capsys):
     assert "No data points available" in capsys.readouterr().out
 
 
+def test_max_page_size_is_used(ini_file, github):
+    assert GitHubStats("owner/repo", False).github is github.return_value
+    assert github.call_args[1]["per_page"] == 100
+
+
+def test_client_is_shared(ini_file, github):
+    assert (GitHubStats("owner/repo", False).github is
+            GitHubStats("owner/other", False).github)
+    assert github.call_count == 1
+
+
 def test_one_open_issue(ini_file, issues):
     issues.return_value = PaginatedList([
         Issue(1, datetime(2000, 1, 1), None, False, "open")
@@ -56,12 +112,12 @@ def test_one_open_issue(ini_file, issues):
     cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
     assert cache_path.exists()
     cached = json.loads(cache_path.read_text())
-    assert len(cached["data"]) == 1
-    assert cached["data"][0]["created_at"]["iso"] == "2000-01-01T00:00:00"
-    assert cached["data"][0]["closed_at"] is None
-    assert cached["data"][0]["number"] == 1
-    assert cached["data"][0]["state"] == "open"
-    assert not cached["data"][0]["is_pr"]
+    assert len(cached["data"]["number"]) == 1
+    assert cached["data"]["created_at"][0] == "2000-01-01T00:00:00"
+    assert cached["data"]["closed_at"][0] is None
+    assert cached["data"]["number"][0] == 1
+    assert cached["data"]["state"][0] == "open"
+    assert not cached["data"]["is_pr"][0]
 
 
 def test_one_closed_issue(ini_file, issues):
@@ -80,7 +136,7 @@ def test_one_closed_issue(ini_file, issues):
     cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
     assert cache_path.exists()
     cached = json.loads(cache_path.read_text())
-    assert len(cached["data"]) == 1
+    assert len(cached["data"]["number"]) == 1
 
 
 def test_immediately_closed_issue_is_ignored(ini_file, issues):
@@ -104,12 +160,12 @@ def test_query_pr_with_one_issue(ini_file, issues):
     cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
     assert cache_path.exists()
     cached = json.loads(cache_path.read_text())
-    assert len(cached["data"]) == 1
-    assert cached["data"][0]["created_at"]["iso"] == "2000-01-01T00:00:00"
-    assert cached["data"][0]["closed_at"] is None
-    assert cached["data"][0]["number"] == 1
-    assert cached["data"][0]["state"] == "open"
-    assert not cached["data"][0]["is_pr"]
+    assert len(cached["data"]["number"]) == 1
+    assert cached["data"]["created_at"][0] == "2000-01-01T00:00:00"
+    assert cached["data"]["closed_at"][0] is None
+    assert cached["data"]["number"][0] == 1
+    assert cached["data"]["state"][0] == "open"
+    assert not cached["data"]["is_pr"][0]
 
 
 def test_one_pr_with_issue_present(ini_file, issues):
@@ -125,7 +181,7 @@ def test_one_pr_with_issue_present(ini_file, issues):
     cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
     assert cache_path.exists()
     cached = json.loads(cache_path.read_text())
-    assert len(cached["data"]) == 2
+    assert len(cached["data"]["number"]) == 2
 
 
 def test_several_issues(ini_file, issues, issue_list):
@@ -141,6 +197,40 @@ def test_several_issues(ini_file, issues, issue_list):
     assert contents[3] == "2000-01-07 00:00:00,2"
 
 
+def test_all_pages_are_fetched(ini_file, github, issues, issue_list):
+    issues.return_value = issue_list
+    GitHubStats("owner/repo", False, "test.csv").issue_pr_stats(show_issues=True)
+    request = github.return_value.requester.requestJsonAndCheck
+    pages = sorted(call[1]["parameters"].get("page", 1)
+                   for call in request.call_args_list)
+    assert pages == [1, 2, 3]
+    cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
+    cached = json.loads(cache_path.read_text())
+    assert cached["data"]["number"] == [1, 2, 3, 4, 5, 6]
+
+
+def test_single_page_needs_one_request(ini_file, github, issues):
+    issues.return_value = PaginatedList([
+        Issue(1, datetime(2000, 1, 1), None, False, "open"),
+    ])
+    GitHubStats("owner/repo", False, "test.csv").issue_pr_stats(show_issues=True)
+    assert github.return_value.requester.requestJsonAndCheck.call_count == 1
+
+
+def test_issue_added_while_fetching(ini_file, issues, issue_list):
+    del issue_list[5]
+    del issue_list[4]
+    new_issue = Issue(7, datetime(2000, 1, 8), None, False, "open")
+    # the newest issues are returned first - a new issue created after
+    # the first page has been fetched moves the last issue to a new page
+    issues.side_effect = [issue_list] + [
+        PaginatedList([new_issue] + list(issue_list))] * 3
+    GitHubStats("owner/repo", False, "test.csv").issue_pr_stats(show_issues=True)
+    cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
+    cached = json.loads(cache_path.read_text())
+    assert cached["data"]["number"] == [1, 2, 3, 4]
+
+
 def test_several_prs(ini_file, issues, issue_list):
     issues.return_value = issue_list
     GitHubStats("owner/repo", False, "test.csv").issue_pr_stats(show_issues=False)
@@ -196,3 +286,117 @@ def test_cache(ini_file, issues, issue_list):
     assert contents[5] == "2000-01-10 00:00:00,4"
     assert contents[6] == "2000-01-12 00:00:00,3"
     assert contents[7] == "2000-01-13 00:00:00,2"
+
+
+def test_incremental_cache_update(ini_file, issues):
+    utc = timezone.utc
+    issues.return_value = PaginatedList([
+        Issue(1, datetime(2000, 1, 1, tzinfo=utc), None, False, "open"),
+        Issue(2, datetime(2000, 1, 2, tzinfo=utc), None, False, "open"),
+        Issue(3, datetime(2000, 1, 3, tzinfo=utc), None, True, "open"),
+    ])
+    GitHubStats("owner/repo", False, "test.csv").issue_pr_stats(show_issues=True)
+    assert "since" not in issues.call_args[1]
+
+    # only issues changed since the last call are returned
+    issues.return_value = PaginatedList([
+        Issue(5, datetime(2000, 1, 6, tzinfo=utc), None, False, "open"),
+        Issue(4, datetime(2000, 1, 5, tzinfo=utc), None, False, "open"),
+        Issue(1, datetime(2000, 1, 1, tzinfo=utc),
+              datetime(2000, 1, 4, tzinfo=utc), False, "closed"),
+    ])
+    GitHubStats("owner/repo", False, "test.csv").issue_pr_stats(show_issues=True)
+    assert "since" in issues.call_args[1]
+    contents = Path("test.csv").read_text().strip().split("\n")
+    assert contents == [
+        "2000-01-01 00:00:00+00:00,1",
+        "2000-01-02 00:00:00+00:00,2",
+        "2000-01-04 00:00:00+00:00,1",
+        "2000-01-05 00:00:00+00:00,2",
+        "2000-01-06 00:00:00+00:00,3",
+    ]
+    cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
+    cached = json.loads(cache_path.read_text())
+    assert cached["data"]["number"] == [1, 2, 3, 4, 5]
+    assert cached["data"]["state"][0] == "closed"
+
+
+def test_old_cache_format_is_read(ini_file, issues):
+    cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
+    cache_path.parent.mkdir(parents=True)
+    cache_path.write_text(json.dumps({
+        "since": {"iso": "2000-01-05T00:00:00+00:00"},
+        "data": [
+            {"number": 1, "is_pr": False, "state": "closed",
+             "created_at": {"iso": "2000-01-01T00:00:00+00:00"},
+             "closed_at": {"iso": "2000-01-04T00:00:00+00:00"}},
+            {"number": 2, "is_pr": False, "state": "open",
+             "created_at": {"iso": "2000-01-02T00:00:00+00:00"},
+             "closed_at": None},
+            {"number": 3, "is_pr": True, "state": "open",
+             "created_at": {"iso": "2000-01-03T00:00:00+00:00"},
+             "closed_at": None},
+        ]
+    }))
+    utc = timezone.utc
+    issues.return_value = PaginatedList([
+        Issue(4, datetime(2000, 1, 6, tzinfo=utc), None, False, "open"),
+    ])
+    GitHubStats("owner/repo", False, "test.csv").issue_pr_stats(show_issues=True)
+    assert issues.call_args[1]["since"] == "2000-01-05T00:00:01Z"
+
+    contents = Path("test.csv").read_text().strip().split("\n")
+    assert contents == [
+        "2000-01-01 00:00:00+00:00,1",
+        "2000-01-02 00:00:00+00:00,2",
+        "2000-01-04 00:00:00+00:00,1",
+        "2000-01-06 00:00:00+00:00,2",
+    ]
+    cached = json.loads(cache_path.read_text())
+    assert cached["schema"] == 2
+    assert cached["data"]["number"] == [1, 2, 3, 4]
+    assert cached["data"]["created_at"][0] == "2000-01-01T00:00:00+00:00"
+    assert cached["data"]["closed_at"][:2] == ["2000-01-04T00:00:00+00:00",
+                                               None]
+
+
+def test_since_is_updated_for_unchanged_issues(ini_file, issues):
+    utc = timezone.utc
+    issues.return_value = PaginatedList([
+        Issue(1, datetime(2000, 1, 1, tzinfo=utc), None, False, "open"),
+        Issue(2, datetime(2000, 1, 2, tzinfo=utc), None, False, "open"),
+    ])
+    GitHubStats("owner/repo", False, "test.csv").issue_pr_stats(show_issues=True)
+    cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Issues.json"
+    first_since = json.loads(cache_path.read_text())["since"]
+
+    # the issue has been updated, but not in a way relevant for the cache
+    issues.return_value = PaginatedList([
+        Issue(2, datetime(2000, 1, 2, tzinfo=utc), None, False, "open"),
+    ])
+    GitHubStats("owner/repo", False, "test1.csv").issue_pr_stats(show_issues=True)
+    cached = json.loads(cache_path.read_text())
+    assert cached["since"] > first_since
+    assert cached["data"]["number"] == [1, 2]
+    assert Path("test1.csv").read_text() == Path("test.csv").read_text()
+
+    # the next run only requests issues updated after the second run
+    issues.return_value = PaginatedList()
+    GitHubStats("owner/repo", False, "test2.csv").issue_pr_stats(show_issues=True)
+    assert issues.call_args[1]["since"] > first_since
+
+
+def test_issue_lifetime(ini_file, issues):
+    start = utcnow() - timedelta(days=20)
+    issues.return_value = PaginatedList([
+        Issue(1, start, start + timedelta(days=10), False, "closed"),
+        Issue(2, start + timedelta(days=8), None, False, "open"),
+        Issue(3, start + timedelta(days=9), None, True, "open"),
+    ])
+    GitHubStats("owner/repo", False, "test.csv").issue_lifetime()
+    contents = Path("test.csv").read_text().strip().split("\n")
+    assert contents == [
+        f"{start},7",
+        f"{start + timedelta(days=7)},10",
+        f"{start + timedelta(days=14)},11",
+    ]
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import matplotlib
+import matplotlib.dates
+import numpy as np
+import pytest
+
+from ghrepo_stats.show_gh_stats import GitHubStats, lttb_indices
+
+
+def test_lttb_keeps_first_and_last_point():
+    x = np.arange(100)
+    indices = lttb_indices(x, np.sin(x), 10)
+    assert indices[0] == 0
+    assert indices[-1] == 99
+
+
+def test_lttb_returns_increasing_indices():
+    x = np.arange(1000)
+    indices = lttb_indices(x, np.sin(x / 10) * x, 50)
+    assert len(indices) == 50
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_returns_all_points_if_not_more_than_n_out():
+    x = np.arange(10)
+    assert list(lttb_indices(x, x, 10)) == list(range(10))
+    assert list(lttb_indices(x, x, 20)) == list(range(10))
+
+
+def test_lttb_selects_spike():
+    x = np.arange(100)
+    y = np.zeros(100)
+    y[47] = 100
+    assert 47 in lttb_indices(x, y, 10)
+
+
+@pytest.fixture
+def pyplot():
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as pyplot
+    with mock.patch.object(pyplot, "show") as show:
+        yield pyplot
+        show.assert_called_once()
+    pyplot.close("all")
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(GitHubStats, "max_plot_points", 10)
+    yield GitHubStats("owner/repo", False)
+
+
+def plot_times(count):
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    return [start + timedelta(days=i // 2) for i in range(count)]
+
+
+def test_show_plot(pyplot, stats):
+    times = plot_times(50)
+    stats.show_plot(np.arange(50), times, "Title")
+    axes = pyplot.gca()
+    assert axes.get_title() == "owner/repo: Title"
+    line = axes.get_lines()[0]
+    assert len(line.get_xdata()) == 10
+
+
+def test_show_step_plot(pyplot, stats):
+    # only the last value at the same time is shown
+    times = plot_times(12)
+    stats.show_plot(np.arange(12), times, "Title", steps=True)
+    line = pyplot.gca().get_lines()[0]
+    assert list(line.get_ydata()) == [1, 3, 5, 7, 9, 11]
+    assert line.get_drawstyle() == "steps-post"
+    assert line.get_xdata()[0] == matplotlib.dates.date2num(times[0])
@@ -54,9 +54,10 @@ def test_one_star(ini_file, stargazers):
     cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Stars.json"
     assert cache_path.exists()
     cached = json.loads(cache_path.read_text())
-    assert len(cached["data"]) == 1
-    assert cached["data"][0]["starred_at"]["iso"] == "2000-01-01T00:00:00+00:00"
-    assert cached["data"][0]["id"] == 24
+    assert cached["schema"] == 2
+    assert len(cached["data"]["id"]) == 1
+    assert cached["data"]["starred_at"][0] == "2000-01-01T00:00:00+00:00"
+    assert cached["data"]["id"][0] == 24
 
 
 def test_several_stars(ini_file, stargazers, stargazer_list):
@@ -71,11 +72,11 @@ def test_several_stars(ini_file, stargazers, stargazer_list):
     cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Stars.json"
     assert cache_path.exists()
     cached = json.loads(cache_path.read_text())
-    assert len(cached["data"]) == 3
-    assert cached["data"][0]["starred_at"]["iso"] == "2000-01-01T00:00:00+00:00"
-    assert cached["data"][0]["id"] == 24
-    assert cached["data"][2]["starred_at"]["iso"] == "2000-01-03T00:00:00+00:00"
-    assert cached["data"][2]["id"] == 42
+    assert len(cached["data"]["id"]) == 3
+    assert cached["data"]["starred_at"][0] == "2000-01-01T00:00:00+00:00"
+    assert cached["data"]["id"][0] == 24
+    assert cached["data"]["starred_at"][2] == "2000-01-03T00:00:00+00:00"
+    assert cached["data"]["id"][2] == 42
 
 
 def test_caching(ini_file, stargazers, stargazer_list, capsys):
@@ -207,3 +208,26 @@ def test_caching_after_removing_all_and_adding(ini_file, stargazers, stargazer_l
     contents = csv.read_text().strip().split("\n")
     assert len(contents) == 1
     assert contents[0] == "2000-01-04 00:00:00+00:00,1"
+
+
+def test_old_cache_format_is_read(ini_file, stargazers, stargazer_list, capsys):
+    cache_path = Path.home() / ".ghrepo-stats" / "owner" / "repo" / "Stars.json"
+    cache_path.parent.mkdir(parents=True)
+    cache_path.write_text(json.dumps({
+        "since": {"iso": "2000-01-05T00:00:00+00:00"},
+        "data": [
+            {"starred_at": {"iso": "2000-01-01T00:00:00+00:00"}, "id": 24},
+            {"starred_at": {"iso": "2000-01-02T00:00:00+00:00"}, "id": 12},
+        ]
+    }))
+    stargazers.return_value = stargazer_list
+    GitHubStats("owner/repo", True, "test.csv").star_stats()
+    out = capsys.readouterr()
+    assert "user1" not in out.out
+    assert "user3" in out.out
+
+    contents = Path("test.csv").read_text().strip().split("\n")
+    assert len(contents) == 3
+    assert contents[0] == "2000-01-01 00:00:00+00:00,1"
+    cached = json.loads(cache_path.read_text())
+    assert cached["data"]["starred_at"][0] == "2000-01-01T00:00:00+00:00"
@@ -6,15 +6,51 @@ class User:
         self.id = user_id
 
 
-class PaginatedList(list):
+class PaginatedList:
     """Mimics github.PaginatedList."""
 
+    def __init__(self, items=()):
+        self._items = list(items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __reversed__(self):
+        return reversed(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __delitem__(self, index):
+        del self._items[index]
+
+    def append(self, item):
+        self._items.append(item)
+
+    def extend(self, items):
+        self._items.extend(items)
+
     @property
     def reversed(self):
-        copy = self.copy()
-        copy.reverse()
-        return PaginatedList(copy)
+        return ReversedPaginatedList(self)
 
     @property
     def totalCount(self):
         return len(self)
+
+
+class ReversedPaginatedList:
+    """Mimics the reversed github.PaginatedList as a view on the list."""
+
+    def __init__(self, items):
+        self._items = items
+
+    def __iter__(self):
+        return reversed(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def totalCount(self):
+        return len(self._items)